@@ -1,3 +1,3 @@
 # inventory package
 # keep this file so `python -m inventory.app` and imports work reliably
-__all__ = ["models", "app", "web"]
+__all__ = ["models", "app", "web", "reconcile", "snapshot"]
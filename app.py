@@ -9,6 +9,9 @@ Commands:
   transfer               Transfer between warehouses
   list-products          Show products
   show-inventory <sku>   Show inventory rows for a product
+  reconcile <files...>   Diff physical count files against inventory
+  snapshot               Write a read-only reporting snapshot (--interval to repeat)
+  snapshot-status        Show snapshot age and copy duration
 
 Example:
   python app.py init
@@ -17,11 +20,13 @@ Example:
   python app.py add-warehouse --name "Overflow"
   python app.py stock-in --sku PROD1 --warehouse 1 --qty 100
   python app.py transfer --sku PROD1 --from 1 --to 2 --qty 20
+  python app.py reconcile counts.csv --report variances.csv --apply --reason "Q3 count"
+  python app.py snapshot --interval 60
 
 """
 import argparse
 import sys
-from inventory import models
+from inventory import models, reconcile, snapshot
 
 DB_PATH = "inventory.db"
 
@@ -43,7 +48,7 @@ def cmd_add_warehouse(args):
 
 def cmd_stock_in(args):
     # resolve sku -> id
-    rows = [p for p in models.list_products(db_path=DB_PATH) if p["sku"] == args.sku]
+    rows = [p for p in models.list_products(db_path=DB_PATH, use_snapshot=False) if p["sku"] == args.sku]
     if not rows:
         print("Product not found")
         return
@@ -53,7 +58,7 @@ def cmd_stock_in(args):
 
 
 def cmd_stock_out(args):
-    rows = [p for p in models.list_products(db_path=DB_PATH) if p["sku"] == args.sku]
+    rows = [p for p in models.list_products(db_path=DB_PATH, use_snapshot=False) if p["sku"] == args.sku]
     if not rows:
         print("Product not found")
         return
@@ -66,7 +71,7 @@ def cmd_stock_out(args):
 
 
 def cmd_transfer(args):
-    rows = [p for p in models.list_products(db_path=DB_PATH) if p["sku"] == args.sku]
+    rows = [p for p in models.list_products(db_path=DB_PATH, use_snapshot=False) if p["sku"] == args.sku]
     if not rows:
         print("Product not found")
         return
@@ -93,6 +98,51 @@ def cmd_show_inventory(args):
         print(f"Warehouse {r['warehouse_id']} ({r['warehouse_name']}): {r['quantity']}")
 
 
+def cmd_reconcile(args):
+    failed = {}
+    try:
+        variances = reconcile.reconcile(args.files, apply=args.apply, reason=args.reason, workers=args.workers, db_path=DB_PATH)
+    except reconcile.ReconcileError as e:
+        # report what the successful warehouses found (and, with --apply, committed)
+        variances, failed = e.variances, e.failed
+    except Exception as e:
+        print("Error:", e)
+        return 1
+    if args.report == "-":
+        reconcile.write_report(variances, sys.stdout)
+    else:
+        with open(args.report, "w", encoding="utf-8", newline="") as f:
+            reconcile.write_report(variances, f)
+    adjusted = sum(1 for v in variances if v["status"] == "adjust")
+    unknown = len(variances) - adjusted
+    action = "posted" if args.apply else "found"
+    print(f"{adjusted} adjustments {action}, {unknown} unknown SKUs", file=sys.stderr)
+    if failed:
+        for wid, err in sorted(failed.items()):
+            print(f"Error: warehouse {wid} failed{', nothing posted' if args.apply else ''}: {err}", file=sys.stderr)
+        return 1
+
+
+def cmd_snapshot(args):
+    if args.interval:
+        snapshot.run_periodic(DB_PATH, args.interval)
+        return
+    try:
+        info = snapshot.take_snapshot(DB_PATH)
+    except Exception as e:
+        print("Error:", e)
+        return 1
+    print(f"Snapshot {info['path']} copied in {info['copy_seconds']:.3f}s")
+
+
+def cmd_snapshot_status(args):
+    stats = snapshot.snapshot_stats(DB_PATH)
+    if stats is None:
+        print("No snapshot")
+        return
+    print(f"Snapshot {stats['path']}: age {stats['age']:.1f}s, copied in {stats['copy_seconds']:.3f}s")
+
+
 def main(argv=None):
     p = argparse.ArgumentParser()
     sub = p.add_subparsers(dest="cmd")
@@ -139,12 +189,25 @@ def main(argv=None):
     si.add_argument("--sku", required=True)
     si.set_defaults(func=cmd_show_inventory)
 
+    rc = sub.add_parser("reconcile")
+    rc.add_argument("files", nargs="+", help="CSV count files with warehouse_id,sku,quantity columns")
+    rc.add_argument("--report", default="-", help="variance report path (default: stdout)")
+    rc.add_argument("--apply", action="store_true", help="post adjustments as movements")
+    rc.add_argument("--reason", default="cycle count")
+    rc.add_argument("--workers", type=int, default=None)
+    rc.set_defaults(func=cmd_reconcile)
+
+    sn = sub.add_parser("snapshot")
+    sn.add_argument("--interval", type=float, default=None, help="repeat every N seconds")
+    sn.set_defaults(func=cmd_snapshot)
+
+    sub.add_parser("snapshot-status").set_defaults(func=cmd_snapshot_status)
+
     args = p.parse_args(argv)
     if not hasattr(args, "func"):
         p.print_help()
         return 1
-    args.func(args)
-    return 0
+    return args.func(args) or 0
 
 
 if __name__ == "__main__":
@@ -1,17 +1,47 @@
 """
 Simple SQLite-backed data layer for the inventory demo.
 Provides: init_db, create_product, create_warehouse, add_stock, remove_stock, transfer_stock,
-get_product_inventory, list_products
+get_product_inventory, list_products, get_data_version, get_read_conn
 
 This is intentionally lightweight and synchronous to keep the demo dependency-free.
+
+Read routing: when `SNAPSHOT_MAX_AGE` is set (seconds, or via the
+INVENTORY_SNAPSHOT_MAX_AGE environment variable), the list_* functions and
+get_product_inventory read from the read-only snapshot written by `snapshot.py`
+as long as it is no older than that bound, and fall back to the live DB otherwise.
+Pass `use_snapshot=False` where a read must see the caller's own writes.
 """
+import os
 import sqlite3
+import time
+import urllib.request
+import warnings
 from typing import Optional, List, Dict, Any
 from werkzeug.security import generate_password_hash, check_password_hash
 
 SCHEMA_PATH = "./db/schema.sql"
 
 
+def _snapshot_max_age_from_env() -> Optional[float]:
+    """Parse INVENTORY_SNAPSHOT_MAX_AGE; an invalid value warns and leaves routing off."""
+    raw = os.environ.get("INVENTORY_SNAPSHOT_MAX_AGE")
+    if not raw:
+        return None
+    try:
+        value = float(raw)
+    except ValueError:
+        value = None
+    # `not >= 0` also rejects nan
+    if value is None or not value >= 0:
+        warnings.warn(f"ignoring INVENTORY_SNAPSHOT_MAX_AGE={raw!r}: expected a number of seconds >= 0; snapshot reads disabled")
+        return None
+    return value
+
+
+SNAPSHOT_MAX_AGE: Optional[float] = _snapshot_max_age_from_env()
+SNAPSHOT_MMAP_SIZE = 256 * 1024 * 1024
+
+
 def dict_factory(cursor, row):
     return {col[0]: row[idx] for idx, col in enumerate(cursor.description)}
 
@@ -23,6 +53,49 @@ def get_conn(db_path: str = ":memory:") -> sqlite3.Connection:
     return conn
 
 
+# Read snapshots
+
+def snapshot_path(db_path: str) -> str:
+    return db_path + ".snapshot"
+
+
+def snapshot_age(db_path: str) -> Optional[float]:
+    """Seconds since the snapshot of `db_path` was taken, or None if there is none.
+
+    `snapshot.take_snapshot` stamps the file mtime with the time the copy started.
+    """
+    try:
+        return max(0.0, time.time() - os.path.getmtime(snapshot_path(db_path)))
+    except OSError:
+        return None
+
+
+def connect_readonly(path: str, immutable: bool = False) -> sqlite3.Connection:
+    """Open an existing DB file read-only (never creates it); `immutable` also skips locking."""
+    uri = "file:" + urllib.request.pathname2url(os.path.abspath(path)) + "?mode=ro"
+    if immutable:
+        uri += "&immutable=1"
+    conn = sqlite3.connect(uri, uri=True)
+    conn.row_factory = dict_factory
+    return conn
+
+
+def open_snapshot(db_path: str) -> sqlite3.Connection:
+    """Open the snapshot of `db_path` read-only; it is never written in place, so skip locking."""
+    conn = connect_readonly(snapshot_path(db_path), immutable=True)
+    conn.execute(f"PRAGMA mmap_size = {SNAPSHOT_MMAP_SIZE}")
+    return conn
+
+
+def get_read_conn(db_path: str = "inventory.db", use_snapshot: bool = True) -> sqlite3.Connection:
+    """Connection for reporting reads: the snapshot if routing is on and it is fresh enough, else the live DB."""
+    if use_snapshot and SNAPSHOT_MAX_AGE is not None:
+        age = snapshot_age(db_path)
+        if age is not None and age <= SNAPSHOT_MAX_AGE:
+            return open_snapshot(db_path)
+    return get_conn(db_path)
+
+
 def init_db(db_path: str = "inventory.db"):
     conn = get_conn(db_path)
     with open(SCHEMA_PATH, "r", encoding="utf-8") as f:
@@ -57,13 +130,45 @@ def create_warehouse(name: str, location: Optional[str] = None, db_path: str = "
     return wid
 
 
-def list_products(db_path: str = "inventory.db") -> List[Dict[str, Any]]:
-    conn = get_conn(db_path)
+def list_products(db_path: str = "inventory.db", use_snapshot: bool = True) -> List[Dict[str, Any]]:
+    conn = get_read_conn(db_path, use_snapshot)
     rows = conn.execute("SELECT * FROM products ORDER BY id").fetchall()
     conn.close()
     return rows
 
 
+# Data versions: per-table change counters used to invalidate cached views.
+# The table is also created on demand so DBs initialised before it existed keep working.
+
+_DATA_VERSIONS_DDL = (
+    "CREATE TABLE IF NOT EXISTS data_versions (name TEXT PRIMARY KEY, version INTEGER NOT NULL DEFAULT 0)"
+)
+
+
+def _bump_data_version(conn: sqlite3.Connection, name: str) -> None:
+    conn.execute(_DATA_VERSIONS_DDL)
+    conn.execute(
+        "INSERT INTO data_versions (name, version) VALUES (?, 1) "
+        "ON CONFLICT(name) DO UPDATE SET version = version + 1",
+        (name,),
+    )
+
+
+def get_data_version(name: str, db_path: str = "inventory.db") -> int:
+    """Return the change counter for `name` (0 if it was never bumped)."""
+    conn = get_conn(db_path)
+    try:
+        row = conn.execute("SELECT version FROM data_versions WHERE name = ?", (name,)).fetchone()
+    except sqlite3.OperationalError as e:
+        # no data_versions table yet: nothing has been bumped
+        if "no such table" in str(e):
+            return 0
+        raise
+    finally:
+        conn.close()
+    return row["version"] if row else 0
+
+
 # User CRUD (simple)
 def create_user(username: str, email: str, full_name: Optional[str] = None, password: Optional[str] = None, db_path: str = "inventory.db") -> int:
     """Create a user. If `password` is provided it will be hashed and stored in `password_hash`.
@@ -78,14 +183,15 @@ def create_user(username: str, email: str, full_name: Optional[str] = None, pass
         "INSERT INTO users (username, email, full_name, password_hash) VALUES (?, ?, ?, ?)",
         (username, email, full_name, password_hash),
     )
+    _bump_data_version(conn, "users")
     conn.commit()
     uid = cur.lastrowid
     conn.close()
     return uid
 
 
-def list_users(db_path: str = "inventory.db") -> List[Dict[str, Any]]:
-    conn = get_conn(db_path)
+def list_users(db_path: str = "inventory.db", use_snapshot: bool = True) -> List[Dict[str, Any]]:
+    conn = get_read_conn(db_path, use_snapshot)
     rows = conn.execute("SELECT * FROM users ORDER BY id").fetchall()
     conn.close()
     return rows
@@ -102,6 +208,7 @@ def delete_user(user_id: int, db_path: str = "inventory.db") -> None:
     conn = get_conn(db_path)
     try:
         conn.execute("DELETE FROM users WHERE id = ?", (user_id,))
+        _bump_data_version(conn, "users")
         conn.commit()
     finally:
         conn.close()
@@ -219,8 +326,8 @@ def transfer_stock(product_id: int, from_warehouse: int, to_warehouse: int, quan
         conn.close()
 
 
-def get_product_inventory(product_id: int, db_path: str = "inventory.db") -> List[Dict[str, Any]]:
-    conn = get_conn(db_path)
+def get_product_inventory(product_id: int, db_path: str = "inventory.db", use_snapshot: bool = True) -> List[Dict[str, Any]]:
+    conn = get_read_conn(db_path, use_snapshot)
     rows = conn.execute(
         "SELECT i.*, w.name AS warehouse_name FROM inventory i JOIN warehouses w ON i.warehouse_id = w.id WHERE i.product_id = ?",
         (product_id,),
@@ -0,0 +1,220 @@
+"""
+Cycle-count reconciliation for the inventory demo.
+
+Compares physical count files against the `inventory` table and optionally posts
+the differences as `movements`. Provides: read_counts, reconcile_warehouse,
+reconcile, write_report
+
+Count files are CSV with a header row containing `warehouse_id`, `sku` and
+`quantity`. A SKU may appear on several lines (e.g. one per bin); the lines are
+summed. Each warehouse that appears in the counts is treated as fully counted:
+products with stock on hand but no count line get a counted quantity of 0.
+
+The pipeline streams the count files once, spooling lines into one partition
+file per warehouse, then hands each partition to a worker process. Workers total
+their partition per SKU, so memory is bounded by the number of distinct SKUs
+rather than count lines, and merge the SKU-sorted totals against
+`products LEFT JOIN inventory` (also read in SKU order), so no per-SKU queries
+are issued. With `apply=True` each worker writes all of its adjustments in a
+single transaction; if some warehouses fail, reconcile raises ReconcileError
+carrying the rows of the warehouses that did commit.
+"""
+import csv
+import os
+import sqlite3
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Optional, List, Dict, Any, Iterable, Iterator, Tuple
+
+from inventory import models
+
+# worker transactions run concurrently against one SQLite file; wait for the
+# write lock instead of failing with "database is locked"
+BUSY_TIMEOUT_MS = 60000
+
+REPORT_FIELDS = ["warehouse_id", "sku", "product_id", "system_qty", "counted_qty", "variance", "status"]
+
+
+class ReconcileError(Exception):
+    """Some warehouses failed; `variances` holds the rows of those that succeeded."""
+
+    def __init__(self, variances: List[Dict[str, Any]], failed: Dict[int, BaseException]):
+        self.variances = variances
+        self.failed = failed
+        detail = "; ".join(f"warehouse {wid}: {err}" for wid, err in sorted(failed.items()))
+        super().__init__(f"{len(failed)} warehouse(s) failed: {detail}")
+
+
+def read_counts(paths: Iterable[str]) -> Iterator[Tuple[int, str, int]]:
+    """Yield (warehouse_id, sku, quantity) from each count file, streaming line by line."""
+    for path in paths:
+        # utf-8-sig: spreadsheet exports often start with a BOM
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            reader = csv.DictReader(f)
+            missing = {"warehouse_id", "sku", "quantity"} - set(reader.fieldnames or [])
+            if missing:
+                raise ValueError(f"{path}: missing columns {', '.join(sorted(missing))}")
+            for lineno, row in enumerate(reader, start=2):
+                try:
+                    warehouse_id, sku, quantity = int(row["warehouse_id"]), row["sku"].strip(), int(row["quantity"])
+                except (TypeError, ValueError, AttributeError):
+                    # short rows leave missing fields as None
+                    raise ValueError(f"{path}:{lineno}: bad count line {row!r}")
+                # remove_stock/transfer_stock never allow negative stock; neither does a count
+                if not sku or quantity < 0:
+                    raise ValueError(f"{path}:{lineno}: bad count line {row!r}")
+                yield warehouse_id, sku, quantity
+
+
+def _partition_counts(paths: Iterable[str], spool_dir: str) -> Dict[int, str]:
+    """Spool count lines into one `sku,quantity` file per warehouse; return {warehouse_id: path}."""
+    parts: Dict[int, str] = {}
+    handles = {}
+    try:
+        for warehouse_id, sku, quantity in read_counts(paths):
+            w = handles.get(warehouse_id)
+            if w is None:
+                path = os.path.join(spool_dir, f"wh_{warehouse_id}.csv")
+                fh = open(path, "w", encoding="utf-8", newline="")
+                w = handles[warehouse_id] = (fh, csv.writer(fh))
+                parts[warehouse_id] = path
+            w[1].writerow((sku, quantity))
+    finally:
+        for fh, _ in handles.values():
+            fh.close()
+    return parts
+
+
+def _sorted_counts(partition_path: str) -> Iterator[Tuple[str, int]]:
+    """Yield (sku, total counted quantity) in SKU order for one warehouse partition."""
+    totals: Dict[str, int] = {}
+    with open(partition_path, "r", encoding="utf-8", newline="") as f:
+        for sku, qty in csv.reader(f):
+            totals[sku] = totals.get(sku, 0) + int(qty)
+    for sku in sorted(totals):
+        yield sku, totals[sku]
+
+
+def _system_rows(conn: sqlite3.Connection, warehouse_id: int) -> Iterator[Dict[str, Any]]:
+    """Yield every product with its on-hand quantity in `warehouse_id`, in SKU order."""
+    cur = conn.execute(
+        "SELECT p.id AS product_id, p.sku, COALESCE(i.quantity, 0) AS quantity "
+        "FROM products p LEFT JOIN inventory i ON i.product_id = p.id AND i.warehouse_id = ? "
+        "ORDER BY p.sku",
+        (warehouse_id,),
+    )
+    for row in cur:
+        yield row
+
+
+def _merge(system: Iterator[Dict[str, Any]], counts: Iterator[Tuple[str, int]], warehouse_id: int) -> Iterator[Dict[str, Any]]:
+    """Sorted-merge join of system rows and counts; yield a report row for every mismatch."""
+    s = next(system, None)
+    c = next(counts, None)
+    while s is not None or c is not None:
+        if c is None or (s is not None and s["sku"] < c[0]):
+            # product not counted: treat as counted zero
+            if s["quantity"] != 0:
+                yield {"warehouse_id": warehouse_id, "sku": s["sku"], "product_id": s["product_id"],
+                       "system_qty": s["quantity"], "counted_qty": 0, "variance": -s["quantity"], "status": "adjust"}
+            s = next(system, None)
+        elif s is None or c[0] < s["sku"]:
+            # counted SKU with no product row; report it but never adjust
+            yield {"warehouse_id": warehouse_id, "sku": c[0], "product_id": None,
+                   "system_qty": None, "counted_qty": c[1], "variance": None, "status": "unknown_sku"}
+            c = next(counts, None)
+        else:
+            if s["quantity"] != c[1]:
+                yield {"warehouse_id": warehouse_id, "sku": s["sku"], "product_id": s["product_id"],
+                       "system_qty": s["quantity"], "counted_qty": c[1], "variance": c[1] - s["quantity"], "status": "adjust"}
+            s = next(system, None)
+            c = next(counts, None)
+
+
+def _post_adjustments(conn: sqlite3.Connection, warehouse_id: int, variances: List[Dict[str, Any]], reason: Optional[str]) -> None:
+    adjust = [v for v in variances if v["status"] == "adjust"]
+    conn.executemany(
+        "INSERT INTO inventory (product_id, warehouse_id, quantity) VALUES (?, ?, ?) "
+        "ON CONFLICT(product_id, warehouse_id) DO UPDATE SET quantity = excluded.quantity",
+        [(v["product_id"], warehouse_id, v["counted_qty"]) for v in adjust],
+    )
+    # gains are recorded like add_stock (to_warehouse), losses like remove_stock (from_warehouse)
+    conn.executemany(
+        "INSERT INTO movements (product_id, from_warehouse, to_warehouse, quantity, reason) VALUES (?, ?, ?, ?, ?)",
+        [
+            (v["product_id"], None, warehouse_id, v["variance"], reason) if v["variance"] > 0
+            else (v["product_id"], warehouse_id, None, -v["variance"], reason)
+            for v in adjust
+        ],
+    )
+
+
+def reconcile_warehouse(warehouse_id: int, partition_path: str, apply: bool = False, reason: Optional[str] = None, db_path: str = "inventory.db") -> List[Dict[str, Any]]:
+    """Diff one warehouse partition against `inventory`; optionally post the adjustments.
+
+    Runs in a worker process, so it opens its own connection. With `apply=True` the
+    diff and the adjustments happen inside one write transaction, so stock moved by
+    another writer in between cannot be overwritten.
+    """
+    conn = models.get_conn(db_path)
+    try:
+        conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+        if not apply:
+            return list(_merge(_system_rows(conn, warehouse_id), _sorted_counts(partition_path), warehouse_id))
+        conn.isolation_level = None
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            variances = list(_merge(_system_rows(conn, warehouse_id), _sorted_counts(partition_path), warehouse_id))
+            _post_adjustments(conn, warehouse_id, variances, reason)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return variances
+    finally:
+        conn.close()
+
+
+def reconcile(paths: Iterable[str], apply: bool = False, reason: Optional[str] = None, workers: Optional[int] = None, db_path: str = "inventory.db") -> List[Dict[str, Any]]:
+    """Reconcile count files against `inventory`, one worker process per warehouse.
+
+    Returns the variance rows ordered by warehouse and SKU. Unknown warehouse ids
+    raise ValueError before any worker starts. If any warehouse fails, the others
+    still finish (and commit, with `apply=True`) and ReconcileError is raised.
+    """
+    with tempfile.TemporaryDirectory(prefix="inv_reconcile_") as spool_dir:
+        parts = _partition_counts(paths, spool_dir)
+        if not parts:
+            return []
+        conn = models.get_conn(db_path)
+        try:
+            known = {r["id"] for r in conn.execute("SELECT id FROM warehouses").fetchall()}
+        finally:
+            conn.close()
+        unknown = sorted(set(parts) - known)
+        if unknown:
+            raise ValueError(f"unknown warehouse ids in counts: {unknown}")
+        results: Dict[int, List[Dict[str, Any]]] = {}
+        failed: Dict[int, BaseException] = {}
+        with ProcessPoolExecutor(max_workers=workers or min(len(parts), os.cpu_count() or 1)) as pool:
+            futures = {
+                pool.submit(reconcile_warehouse, wid, path, apply, reason, db_path): wid
+                for wid, path in parts.items()
+            }
+            for future in as_completed(futures):
+                wid = futures[future]
+                try:
+                    results[wid] = future.result()
+                except Exception as e:
+                    failed[wid] = e
+    variances = [row for wid in sorted(results) for row in results[wid]]
+    if failed:
+        raise ReconcileError(variances, failed)
+    return variances
+
+
+def write_report(variances: Iterable[Dict[str, Any]], out) -> None:
+    """Write variance rows as CSV to the open text file `out`."""
+    writer = csv.DictWriter(out, fieldnames=REPORT_FIELDS)
+    writer.writeheader()
+    writer.writerows(variances)
@@ -0,0 +1,84 @@
+"""
+Read-only snapshots of the inventory DB for heavy reporting reads.
+
+Provides: take_snapshot, snapshot_stats, run_periodic
+
+A snapshot is a full copy made with the SQLite backup API into a temporary file,
+then swapped in over `<db>.snapshot` with os.replace, so readers always see
+either the previous or the new copy, never a partial one. Readers open it through
+`models.open_snapshot` (`mode=ro&immutable=1`, mmap). Whether reads are routed to
+it is controlled by `models.SNAPSHOT_MAX_AGE`.
+"""
+import os
+import sqlite3
+import time
+from typing import Optional, Dict, Any
+
+from inventory import models
+
+
+def take_snapshot(db_path: str = "inventory.db") -> Dict[str, Any]:
+    """Copy `db_path` to its snapshot file and swap it in atomically.
+
+    Returns {"path", "taken_at", "copy_seconds"}. Raises FileNotFoundError if
+    `db_path` does not exist rather than snapshotting a freshly created empty DB.
+    """
+    if not os.path.isfile(db_path):
+        raise FileNotFoundError(f"database not found: {db_path}")
+    target = models.snapshot_path(db_path)
+    tmp = f"{target}.tmp-{os.getpid()}"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    # read-only, so a path that vanishes before the open is an error, not a new empty file
+    src = models.connect_readonly(db_path)
+    dst = sqlite3.connect(tmp)
+    try:
+        # a single-step backup runs in one read transaction, so the copy is consistent
+        taken_at = time.time()
+        start = time.perf_counter()
+        src.backup(dst)
+        copy_seconds = time.perf_counter() - start
+        # immutable readers cannot replay a WAL; make the copy self-contained
+        dst.execute("PRAGMA journal_mode = DELETE")
+        dst.execute("CREATE TABLE snapshot_meta (taken_at REAL NOT NULL, copy_seconds REAL NOT NULL)")
+        dst.execute("INSERT INTO snapshot_meta (taken_at, copy_seconds) VALUES (?, ?)", (taken_at, copy_seconds))
+        dst.commit()
+    except Exception:
+        dst.close()
+        os.remove(tmp)
+        raise
+    finally:
+        src.close()
+    dst.close()
+    # models.snapshot_age reads the mtime, so stamp it with the moment the copy started
+    os.utime(tmp, (taken_at, taken_at))
+    os.replace(tmp, target)
+    return {"path": target, "taken_at": taken_at, "copy_seconds": copy_seconds}
+
+
+def snapshot_stats(db_path: str = "inventory.db") -> Optional[Dict[str, Any]]:
+    """Return {"path", "taken_at", "age", "copy_seconds"} for the current snapshot, or None."""
+    age = models.snapshot_age(db_path)
+    if age is None:
+        return None
+    conn = models.open_snapshot(db_path)
+    try:
+        row = conn.execute("SELECT taken_at, copy_seconds FROM snapshot_meta").fetchone()
+    finally:
+        conn.close()
+    return {"path": models.snapshot_path(db_path), "taken_at": row["taken_at"], "age": age, "copy_seconds": row["copy_seconds"]}
+
+
+def run_periodic(db_path: str = "inventory.db", interval: float = 60.0, iterations: Optional[int] = None) -> None:
+    """Take a snapshot every `interval` seconds (forever unless `iterations` is given)."""
+    done = 0
+    while iterations is None or done < iterations:
+        started = time.monotonic()
+        try:
+            info = take_snapshot(db_path)
+            print(f"Snapshot {info['path']} copied in {info['copy_seconds']:.3f}s")
+        except Exception as e:
+            print("Error:", e)
+        done += 1
+        if iterations is None or done < iterations:
+            time.sleep(max(0.0, interval - (time.monotonic() - started)))
@@ -26,3 +26,135 @@ def test_users_pages():
             os.unlink(tmp.name)
         except Exception:
             pass
+
+
+def test_users_table_cache_and_compression():
+    tmp = tempfile.NamedTemporaryFile(delete=False)
+    tmp.close()
+    try:
+        from inventory import models
+        models.init_db(tmp.name)
+        client = setup_app(tmp.name)
+        models.create_user('alice', 'alice@example.com', db_path=tmp.name)
+        rv = client.get('/users')
+        assert b'alice' in rv.data
+        # the cached fragment must be re-rendered after a create via the web form
+        rv = client.post('/users/new', data={'username': 'bob', 'email': 'bob@example.com'})
+        assert rv.status_code == 302
+        rv = client.get('/users')
+        assert b'bob' in rv.data
+        assert web.CSRF_PLACEHOLDER.encode() not in rv.data
+        # the page carries a CSRF token next to reflected `q`: never compress it (BREACH)
+        for url in ('/users', '/users?q=bob'):
+            rv = client.get(url, headers={'Accept-Encoding': 'gzip'})
+            assert rv.status_code == 200
+            assert b'bob' in rv.data
+            assert 'Content-Encoding' not in rv.headers
+            assert 'Accept-Encoding' in rv.headers.get('Vary', '')
+    finally:
+        try:
+            os.unlink(tmp.name)
+        except Exception:
+            pass
+
+
+def test_users_table_csrf_placeholder_not_injectable():
+    tmp = tempfile.NamedTemporaryFile(delete=False)
+    tmp.close()
+    try:
+        from inventory import models
+        from markupsafe import escape
+        models.init_db(tmp.name)
+        client = setup_app(tmp.name)
+        models.create_user('__csrf_token__', 'a@example.com', db_path=tmp.name)
+        models.create_user(str(web.CSRF_PLACEHOLDER), 'b@example.com', db_path=tmp.name)
+        rv = client.get('/users')
+        html = rv.get_data(as_text=True)
+        assert '__csrf_token__ &lt;a@example.com&gt;' in html
+        assert str(escape(str(web.CSRF_PLACEHOLDER))) in html
+        assert str(web.CSRF_PLACEHOLDER) not in html
+    finally:
+        try:
+            os.unlink(tmp.name)
+        except Exception:
+            pass
+
+
+def test_fingerprinted_static_assets():
+    tmp = tempfile.NamedTemporaryFile(delete=False)
+    tmp.close()
+    try:
+        from inventory import models
+        models.init_db(tmp.name)
+        client = setup_app(tmp.name)
+        html = client.get('/users').get_data(as_text=True)
+        css_hash = web._static_hash('css/messages.css')
+        js_hash = web._static_hash('js/messages.js')
+        assert f'/static/css/messages.css?v={css_hash}' in html
+        assert f'/static/js/messages.js?v={js_hash}' in html
+
+        rv = client.get(f'/static/js/messages.js?v={js_hash}')
+        assert rv.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+        for url in ('/static/js/messages.js', '/static/js/messages.js?v=stale'):
+            rv = client.get(url)
+            assert rv.status_code == 200
+            assert 'immutable' not in rv.headers.get('Cache-Control', '')
+        # missing files and directories are plain 404s, never cached for a year
+        for url in ('/static/nope.css', '/static/css'):
+            rv = client.get(url)
+            assert rv.status_code == 404
+            assert 'immutable' not in rv.headers.get('Cache-Control', '')
+    finally:
+        try:
+            os.unlink(tmp.name)
+        except Exception:
+            pass
+
+
+def test_precompressed_static_sibling():
+    import gzip
+    static_dir = tempfile.mkdtemp()
+    old_static = web.app.static_folder
+    try:
+        css = os.path.join(static_dir, 'site.css')
+        with open(css, 'w') as f:
+            f.write('body { color: black; }\n' * 100)
+        # a distinguishable body proves the sibling is served, not a fresh compression
+        with open(css + '.gz', 'wb') as f:
+            f.write(gzip.compress(b'/* precompressed */'))
+        web.app.static_folder = static_dir
+        web._static_compressed.clear()
+        client = setup_app(':memory:')
+        rv = client.get('/static/site.css', headers={'Accept-Encoding': 'gzip'})
+        assert rv.headers['Content-Encoding'] == 'gzip'
+        assert rv.headers['Accept-Ranges'] == 'none'
+        assert gzip.decompress(rv.data) == b'/* precompressed */'
+    finally:
+        web.app.static_folder = old_static
+        web._static_compressed.clear()
+        for name in os.listdir(static_dir):
+            os.unlink(os.path.join(static_dir, name))
+        os.rmdir(static_dir)
+
+
+def test_users_on_db_without_data_versions_table():
+    tmp = tempfile.NamedTemporaryFile(delete=False)
+    tmp.close()
+    try:
+        from inventory import models
+        models.init_db(tmp.name)
+        conn = models.get_conn(tmp.name)
+        conn.execute('DROP TABLE data_versions')
+        conn.commit()
+        conn.close()
+        client = setup_app(tmp.name)
+        assert client.get('/users').status_code == 200
+        uid = models.create_user('carol', 'carol@example.com', db_path=tmp.name)
+        assert b'carol' in client.get('/users').data
+        models.delete_user(uid, db_path=tmp.name)
+        assert b'carol' not in client.get('/users').data
+    finally:
+        try:
+            os.unlink(tmp.name)
+        except Exception:
+            pass
@@ -0,0 +1,119 @@
+import os
+import tempfile
+import pytest
+from inventory import models, reconcile
+
+
+def test_reconcile_reports_and_applies_variances():
+    fd, path = tempfile.mkstemp(prefix="inv_test_", suffix=".db")
+    os.close(fd)
+    cfd, counts = tempfile.mkstemp(prefix="inv_counts_", suffix=".csv")
+    os.close(cfd)
+    try:
+        models.init_db(path)
+        a = models.create_product("SKU-A", "A", db_path=path)
+        b = models.create_product("SKU-B", "B", db_path=path)
+        c = models.create_product("SKU-C", "C", db_path=path)
+        w1 = models.create_warehouse("W1", db_path=path)
+        w2 = models.create_warehouse("W2", db_path=path)
+        models.add_stock(a, w1, 10, db_path=path)
+        models.add_stock(b, w1, 5, db_path=path)
+        models.add_stock(c, w2, 7, db_path=path)
+        with open(counts, "w", encoding="utf-8") as f:
+            # SKU-A split across two bins, SKU-B missing (counted zero), SKU-X unknown
+            f.write("warehouse_id,sku,quantity\n")
+            f.write(f"{w1},SKU-A,8\n{w2},SKU-C,7\n{w1},SKU-A,4\n{w1},SKU-X,1\n")
+
+        variances = reconcile.reconcile([counts], db_path=path, workers=2)
+        by_sku = {v["sku"]: v for v in variances}
+        assert set(by_sku) == {"SKU-A", "SKU-B", "SKU-X"}
+        assert by_sku["SKU-A"]["variance"] == 2
+        assert by_sku["SKU-B"]["variance"] == -5
+        assert by_sku["SKU-X"]["status"] == "unknown_sku"
+        # dry run leaves inventory untouched
+        assert any(r["warehouse_id"] == w1 and r["quantity"] == 10 for r in models.get_product_inventory(a, db_path=path))
+
+        reconcile.reconcile([counts], apply=True, reason="q-count", db_path=path)
+        conn = models.get_conn(path)
+        moves = conn.execute("SELECT * FROM movements WHERE reason = 'q-count' ORDER BY product_id").fetchall()
+        conn.close()
+        # gain on SKU-A goes into W1, loss on SKU-B comes out of W1
+        assert [(m["product_id"], m["from_warehouse"], m["to_warehouse"], m["quantity"]) for m in moves] == [
+            (a, None, w1, 2),
+            (b, w1, None, 5),
+        ]
+        assert any(r["warehouse_id"] == w1 and r["quantity"] == 12 for r in models.get_product_inventory(a, db_path=path))
+        assert any(r["warehouse_id"] == w1 and r["quantity"] == 0 for r in models.get_product_inventory(b, db_path=path))
+        assert [v["sku"] for v in reconcile.reconcile([counts], db_path=path)] == ["SKU-X"]
+    finally:
+        os.remove(path)
+        os.remove(counts)
+
+
+def test_reconcile_rejects_negative_counts():
+    fd, path = tempfile.mkstemp(prefix="inv_test_", suffix=".db")
+    os.close(fd)
+    cfd, counts = tempfile.mkstemp(prefix="inv_counts_", suffix=".csv")
+    os.close(cfd)
+    try:
+        models.init_db(path)
+        a = models.create_product("SKU-A", "A", db_path=path)
+        w1 = models.create_warehouse("W1", db_path=path)
+        models.add_stock(a, w1, 5, db_path=path)
+        with open(counts, "w", encoding="utf-8") as f:
+            f.write(f"warehouse_id,sku,quantity\n{w1},SKU-A,-3\n")
+        with pytest.raises(ValueError, match=":2: bad count line"):
+            reconcile.reconcile([counts], apply=True, db_path=path)
+        assert any(r["quantity"] == 5 for r in models.get_product_inventory(a, db_path=path))
+    finally:
+        os.remove(path)
+        os.remove(counts)
+
+
+def test_read_counts_rejects_malformed_lines_and_accepts_bom():
+    cfd, counts = tempfile.mkstemp(prefix="inv_counts_", suffix=".csv")
+    os.close(cfd)
+    try:
+        for body in ("1\n", "1,,4\n", "1, ,4\n"):
+            with open(counts, "w", encoding="utf-8") as f:
+                f.write("warehouse_id,sku,quantity\n" + body)
+            with pytest.raises(ValueError, match=":2: bad count line"):
+                list(reconcile.read_counts([counts]))
+        with open(counts, "w", encoding="utf-8-sig") as f:
+            f.write("warehouse_id,sku,quantity\n1,SKU-A,3\n")
+        assert list(reconcile.read_counts([counts])) == [(1, "SKU-A", 3)]
+    finally:
+        os.remove(counts)
+
+
+def test_reconcile_reports_committed_warehouses_when_one_fails():
+    fd, path = tempfile.mkstemp(prefix="inv_test_", suffix=".db")
+    os.close(fd)
+    cfd, counts = tempfile.mkstemp(prefix="inv_counts_", suffix=".csv")
+    os.close(cfd)
+    try:
+        models.init_db(path)
+        a = models.create_product("SKU-A", "A", db_path=path)
+        w1 = models.create_warehouse("W1", db_path=path)
+        w2 = models.create_warehouse("W2", db_path=path)
+        models.add_stock(a, w1, 5, db_path=path)
+        models.add_stock(a, w2, 5, db_path=path)
+        conn = models.get_conn(path)
+        conn.execute(
+            f"CREATE TRIGGER fail_w2 BEFORE UPDATE ON inventory WHEN NEW.warehouse_id = {w2} "
+            "BEGIN SELECT RAISE(ABORT, 'w2 is locked'); END"
+        )
+        conn.commit()
+        conn.close()
+        with open(counts, "w", encoding="utf-8") as f:
+            f.write(f"warehouse_id,sku,quantity\n{w1},SKU-A,7\n{w2},SKU-A,9\n")
+
+        with pytest.raises(reconcile.ReconcileError) as exc:
+            reconcile.reconcile([counts], apply=True, reason="q-count", db_path=path)
+        assert set(exc.value.failed) == {w2}
+        assert [(v["warehouse_id"], v["variance"]) for v in exc.value.variances] == [(w1, 2)]
+        inv = {r["warehouse_id"]: r["quantity"] for r in models.get_product_inventory(a, db_path=path)}
+        assert inv == {w1: 7, w2: 5}
+    finally:
+        os.remove(path)
+        os.remove(counts)
@@ -0,0 +1,53 @@
+import os
+import tempfile
+import pytest
+from inventory import models, snapshot
+
+
+def test_snapshot_routing_and_staleness():
+    fd, path = tempfile.mkstemp(prefix="inv_test_", suffix=".db")
+    os.close(fd)
+    old_max_age = models.SNAPSHOT_MAX_AGE
+    try:
+        models.init_db(path)
+        models.create_product("SKU1", "Before", db_path=path)
+        info = snapshot.take_snapshot(path)
+        assert info["copy_seconds"] >= 0
+        models.create_product("SKU2", "After", db_path=path)
+
+        models.SNAPSHOT_MAX_AGE = 3600
+        # routed reads see the snapshot; opting out reads the live DB
+        assert [p["sku"] for p in models.list_products(db_path=path)] == ["SKU1"]
+        assert [p["sku"] for p in models.list_products(db_path=path, use_snapshot=False)] == ["SKU1", "SKU2"]
+
+        # a snapshot older than the bound is ignored
+        os.utime(models.snapshot_path(path), (info["taken_at"] - 120, info["taken_at"] - 120))
+        models.SNAPSHOT_MAX_AGE = 60
+        assert len(models.list_products(db_path=path)) == 2
+
+        stats = snapshot.snapshot_stats(path)
+        assert stats["age"] >= 120
+        assert stats["copy_seconds"] == info["copy_seconds"]
+    finally:
+        models.SNAPSHOT_MAX_AGE = old_max_age
+        for p in (path, models.snapshot_path(path)):
+            if os.path.exists(p):
+                os.remove(p)
+
+
+def test_snapshot_of_missing_db_fails():
+    path = os.path.join(tempfile.mkdtemp(), "missing.db")
+    with pytest.raises(FileNotFoundError):
+        snapshot.take_snapshot(path)
+    assert not os.path.exists(path)
+    assert not os.path.exists(models.snapshot_path(path))
+    os.rmdir(os.path.dirname(path))
+
+
+def test_invalid_snapshot_max_age_env_is_ignored(monkeypatch):
+    for raw in ("30s", "-5", "nan"):
+        monkeypatch.setenv("INVENTORY_SNAPSHOT_MAX_AGE", raw)
+        with pytest.warns(UserWarning, match="INVENTORY_SNAPSHOT_MAX_AGE"):
+            assert models._snapshot_max_age_from_env() is None
+    monkeypatch.setenv("INVENTORY_SNAPSHOT_MAX_AGE", "45")
+    assert models._snapshot_max_age_from_env() == 45.0
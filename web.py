@@ -6,18 +6,172 @@ Routes:
 - GET  /users/new  -> HTML form
 - POST /users/new  -> create user and show a simple success message
 - GET  /users      -> list users
+
+Static assets are linked through `static_url()`, which appends a content hash so
+they can be cached for a year. Text responses are gzip- or brotli-compressed
+(brotli only when the optional `brotli` package is installed), except pages that
+carry a CSRF token: compressing a secret next to user-controlled text leaks it
+through the response size (BREACH).
 """
+import gzip
+import hashlib
 import os
-from flask import Flask, render_template, request, redirect, url_for, session, flash
+from flask import Flask, render_template, request, redirect, url_for, session, flash, g
 from flask_wtf import CSRFProtect
+from flask_wtf.csrf import generate_csrf
+from markupsafe import Markup
+from werkzeug.security import safe_join
 from inventory import models
 
+try:
+    import brotli
+except ImportError:  # optional; gzip is always available
+    brotli = None
+
 app = Flask(__name__)
 DB_PATH = "inventory.db"
 # prefer environment-provided secret; fallback is only for local/dev convenience
 app.secret_key = os.environ.get("FLASK_SECRET", "dev-secret-for-demo")
 csrf = CSRFProtect(app)
 
+STATIC_MAX_AGE = 365 * 24 * 3600
+COMPRESS_MIN_SIZE = 500
+COMPRESSIBLE_MIMETYPES = {
+    "text/html", "text/css", "text/plain", "text/javascript",
+    "application/javascript", "application/json", "image/svg+xml",
+}
+# cached fragments are shared across sessions, so they are rendered with this
+# placeholder and the per-session CSRF token is substituted on every request;
+# it contains `<` and `"`, which autoescaping never emits from user data
+CSRF_PLACEHOLDER = Markup('<csrf-token">')
+
+_static_hashes = {}  # filename -> (mtime, hash)
+_static_compressed = {}  # (filename, encoding) -> (mtime, body)
+_fragment_cache = {}  # (fragment, db_path) -> (data version, html)
+
+
+def _static_path(filename):
+    return safe_join(app.static_folder, filename)
+
+
+def _static_hash(filename):
+    """Short content hash of a static asset, recomputed only when its mtime changes."""
+    path = _static_path(filename)
+    if path is None or not os.path.isfile(path):
+        return None
+    mtime = os.path.getmtime(path)
+    cached = _static_hashes.get(filename)
+    if cached is None or cached[0] != mtime:
+        with open(path, "rb") as f:
+            cached = _static_hashes[filename] = (mtime, hashlib.sha256(f.read()).hexdigest()[:12])
+    return cached[1]
+
+
+@app.template_global()
+def static_url(filename):
+    """URL for a static asset, fingerprinted with a hash of its contents."""
+    digest = _static_hash(filename)
+    if digest is None:
+        return url_for("static", filename=filename)
+    return url_for("static", filename=filename, v=digest)
+
+
+def _negotiate_encoding():
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        return "br"
+    if accepted["gzip"]:
+        return "gzip"
+    return None
+
+
+def _compress(data, encoding):
+    if encoding == "br":
+        return brotli.compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+def _compressed_static(filename, encoding):
+    """Compressed body of a static asset, compressed once per file version.
+
+    A precompressed sibling (`messages.css.br` / `messages.css.gz`) is used when it
+    is at least as new as the asset.
+    """
+    path = _static_path(filename)
+    mtime = os.path.getmtime(path)
+    cached = _static_compressed.get((filename, encoding))
+    if cached is None or cached[0] != mtime:
+        sibling = path + (".br" if encoding == "br" else ".gz")
+        if os.path.exists(sibling) and os.path.getmtime(sibling) >= mtime:
+            with open(sibling, "rb") as f:
+                body = f.read()
+        else:
+            with open(path, "rb") as f:
+                body = _compress(f.read(), encoding)
+        cached = _static_compressed[(filename, encoding)] = (mtime, body)
+    return cached[1]
+
+
+@app.after_request
+def cache_and_compress(response):
+    if (
+        request.endpoint == "static"
+        and response.status_code == 200
+        and request.args.get("v") is not None
+        and request.args.get("v") == _static_hash(request.view_args["filename"])
+    ):
+        # fingerprinted URL: the content behind it never changes
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = STATIC_MAX_AGE
+        response.cache_control.immutable = True
+    response.vary.add("Accept-Encoding")
+    if (
+        response.status_code != 200
+        or (response.is_streamed and request.endpoint != "static")
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+        # generate_csrf() caches the token on `g`; its presence means the body holds it
+        or app.config.get("WTF_CSRF_FIELD_NAME", "csrf_token") in g
+    ):
+        return response
+    encoding = _negotiate_encoding()
+    if encoding is None:
+        return response
+    if request.endpoint == "static":
+        body = _compressed_static(request.view_args["filename"], encoding)
+        response.direct_passthrough = False
+        etag, _ = response.get_etag()
+        if etag:
+            # same resource, different bytes: a weak validator still matches If-None-Match
+            response.set_etag(etag, weak=True)
+    else:
+        data = response.get_data()
+        if len(data) < COMPRESS_MIN_SIZE:
+            return response
+        body = _compress(data, encoding)
+        if len(body) >= len(data):
+            return response
+    response.set_data(body)
+    response.headers["Content-Encoding"] = encoding
+    # byte ranges from send_file refer to the uncompressed file
+    response.headers["Accept-Ranges"] = "none"
+    return response
+
+
+def _users_table(users):
+    return render_template("_users_table.html", users=users, csrf_value=CSRF_PLACEHOLDER)
+
+
+def cached_users_table():
+    """Rendered users table, re-rendered only when the `users` data version changes."""
+    version = models.get_data_version("users", db_path=DB_PATH)
+    key = ("users_table", DB_PATH)
+    cached = _fragment_cache.get(key)
+    if cached is None or cached[0] != version:
+        cached = _fragment_cache[key] = (version, _users_table(models.list_users(db_path=DB_PATH, use_snapshot=False)))
+    return cached[1]
+
 
 @app.route("/users")
 def users_list():
@@ -36,9 +190,11 @@ def users_list():
         finally:
             if conn:
                 conn.close()
+        table = _users_table(users)
     else:
-        users = models.list_users(db_path=DB_PATH)
-    return render_template("users_list.html", users=users, q=q)
+        table = cached_users_table()
+    users_table = Markup(table.replace(CSRF_PLACEHOLDER, generate_csrf()))
+    return render_template("users_list.html", users_table=users_table, q=q)
 
 
 @app.route("/")